@@ -1,8 +1,16 @@
 import flet as ft
+import argparse
+import asyncio
+import calendar
 import json
+import math
 import os
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Optional
+from urllib.parse import urlsplit, parse_qs
 
 # ============================================================
 # MODELO DE DATOS
@@ -28,9 +36,15 @@ class Categoria:
         return cls(**data)
 
 class Transaccion:
+    _ultimo_id = ""
+    
     def __init__(self, monto: float, tipo: str, categoria: str, 
                  cuenta: str, descripcion: str = "", fecha: str = None):
         self.id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        # Varias altas en el mismo microsegundo (lotes, API) repetirían el id
+        if self.id <= Transaccion._ultimo_id:
+            self.id = str(int(Transaccion._ultimo_id) + 1)
+        Transaccion._ultimo_id = self.id
         self.monto = monto
         self.tipo = tipo  # 'ingreso', 'gasto', 'transferencia'
         self.categoria = categoria
@@ -91,6 +105,35 @@ class Cuenta:
         c.saldo = data.get("saldo", c.saldo_inicial)
         return c
 
+class ReglaCategoria:
+    def __init__(self, patron: str, categoria: str, es_regex: bool = False,
+                 cuenta: str = "", monto_min: float = None, monto_max: float = None):
+        self.patron = patron  # palabra clave o expresión regular sobre la descripción
+        self.categoria = categoria
+        self.es_regex = es_regex
+        self.cuenta = cuenta  # vacío: cualquier cuenta
+        self.monto_min = monto_min
+        self.monto_max = monto_max
+    
+    def aplica(self, monto, cuenta):
+        return ((not self.cuenta or self.cuenta == cuenta)
+                and (self.monto_min is None or monto >= self.monto_min)
+                and (self.monto_max is None or monto <= self.monto_max))
+    
+    def to_dict(self):
+        return {
+            "patron": self.patron,
+            "categoria": self.categoria,
+            "es_regex": self.es_regex,
+            "cuenta": self.cuenta,
+            "monto_min": self.monto_min,
+            "monto_max": self.monto_max
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
 # ============================================================
 # GESTOR DE DATOS LOCAL
 # ============================================================
@@ -101,6 +144,11 @@ class FinanceManager:
         self.cuentas: List[Cuenta] = []
         self.categorias: List[Categoria] = []
         self.transacciones: List[Transaccion] = []
+        self.reglas: List[ReglaCategoria] = []
+        self.revision = 0  # aumenta cuando se modifican transacciones ya registradas
+        self.cambios_pendientes = False
+        self._diferir_guardado = 0
+        self._json_transacciones: List[bytes] = []
         self.cargar_datos()
     
     def cargar_datos(self):
@@ -110,20 +158,56 @@ class FinanceManager:
                     data = json.load(f)
                     self.cuentas = [Cuenta.from_dict(c) for c in data.get("cuentas", [])]
                     self.categorias = [Categoria.from_dict(c) for c in data.get("categorias", [])]
+                    self.reglas = [ReglaCategoria.from_dict(r) for r in data.get("reglas", [])]
                     self.transacciones = [Transaccion.from_dict(t) for t in data.get("transacciones", [])]
+                    self._json_transacciones = []
             except:
                 self.inicializar_datos_default()
         else:
             self.inicializar_datos_default()
     
     def guardar_datos(self):
+        if self._diferir_guardado:
+            self.cambios_pendientes = True
+            return
+        
         data = {
             "cuentas": [c.to_dict() for c in self.cuentas],
             "categorias": [c.to_dict() for c in self.categorias],
-            "transacciones": [t.to_dict() for t in self.transacciones]
+            "reglas": [r.to_dict() for r in self.reglas],
+            "transacciones": []
         }
-        with open(self.archivo, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Las transacciones solo se agregan al final: se serializan una vez y
+        # cada guardado codifica únicamente las nuevas
+        if len(self._json_transacciones) > len(self.transacciones):
+            self._json_transacciones = []
+        for t in self.transacciones[len(self._json_transacciones):]:
+            self._json_transacciones.append(json.dumps(t.to_dict(), ensure_ascii=False).encode('utf-8'))
+        # json.dumps sin indent usa el codificador en C (json.dump y indent no)
+        cabecera = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        # Escritura atómica: nunca queda un archivo a medio escribir
+        temporal = self.archivo + ".tmp"
+        with open(temporal, 'wb') as f:
+            f.write(cabecera[:-2])
+            f.write(b", ".join(self._json_transacciones))
+            f.write(b"]}")
+        os.replace(temporal, self.archivo)
+        self.cambios_pendientes = False
+    
+    @contextmanager
+    def guardado_diferido(self, guardar=True):
+        """
+        Agrupa varias operaciones en una sola escritura del archivo.
+        Con guardar=False los cambios quedan en cambios_pendientes y
+        el llamador decide cuándo llamar a guardar_datos.
+        """
+        self._diferir_guardado += 1
+        try:
+            yield
+        finally:
+            self._diferir_guardado -= 1
+            if guardar and not self._diferir_guardado and self.cambios_pendientes:
+                self.guardar_datos()
     
     def inicializar_datos_default(self):
         # Categorías por defecto
@@ -166,8 +250,20 @@ class FinanceManager:
         self.categorias = [c for c in self.categorias if c.nombre != nombre]
         self.guardar_datos()
     
-    def agregar_transaccion(self, monto, tipo, categoria, cuenta, descripcion=""):
-        trans = Transaccion(monto, tipo, categoria, cuenta, descripcion)
+    def agregar_regla(self, patron, categoria, es_regex=False, cuenta="", monto_min=None, monto_max=None):
+        if es_regex:
+            re.compile(patron)  # re.error si el patrón no es válido
+        regla = ReglaCategoria(patron, categoria, es_regex, cuenta, monto_min, monto_max)
+        self.reglas.append(regla)
+        self.guardar_datos()
+        return regla
+    
+    def eliminar_regla(self, indice):
+        self.reglas = [r for i, r in enumerate(self.reglas) if i != indice]
+        self.guardar_datos()
+    
+    def agregar_transaccion(self, monto, tipo, categoria, cuenta, descripcion="", fecha=None):
+        trans = Transaccion(monto, tipo, categoria, cuenta, descripcion, fecha)
         self.transacciones.append(trans)
         
         # Actualizar saldo de cuenta
@@ -182,6 +278,23 @@ class FinanceManager:
         self.guardar_datos()
         return trans
     
+    def agregar_transacciones_lote(self, datos):
+        """
+        Registra varias transacciones (dicts con los argumentos de
+        agregar_transaccion) guardando el archivo una sola vez.
+        """
+        with self.guardado_diferido():
+            return [self.agregar_transaccion(**d) for d in datos]
+    
+    def actualizar_categorias(self, cambios):
+        """Asigna categoría a transacciones ya registradas: lista de (transaccion, categoria)"""
+        for t, categoria in cambios:
+            t.categoria = categoria
+        self.revision += 1
+        # Las transacciones modificadas ya estaban serializadas
+        self._json_transacciones = []
+        self.guardar_datos()
+    
     def transferir_entre_cuentas(self, cuenta_origen, cuenta_destino, monto, comision=0.41):
         """
         Transfiere entre cuentas con comisión automática (por defecto 0.41%)
@@ -226,6 +339,15 @@ class FinanceManager:
     def get_transacciones_recientes(self, limite=10):
         return sorted(self.transacciones, key=lambda x: x.fecha, reverse=True)[:limite]
     
+    def get_transacciones_pagina(self, pagina=1, limite=50, cuenta=None):
+        """Devuelve (transacciones de la página, total) ordenadas de más reciente a más antigua"""
+        trans = self.transacciones
+        if cuenta:
+            trans = [t for t in trans if t.cuenta == cuenta]
+        inicio = (pagina - 1) * limite
+        ordenadas = sorted(trans, key=lambda x: x.fecha, reverse=True)
+        return ordenadas[inicio:inicio + limite], len(trans)
+    
     def get_estadisticas_mes(self):
         # Estadísticas del mes actual
         mes_actual = datetime.now().strftime("%Y-%m")
@@ -240,11 +362,857 @@ class FinanceManager:
             "balance": ingresos - gastos
         }
 
+# ============================================================
+# PRONÓSTICO DE FLUJO DE CAJA
+# ============================================================
+
+def _indice_mes(fecha: str) -> int:
+    # "AAAA-MM-DD ..." -> meses desde el año 0, para operar con enteros
+    return int(fecha[:4]) * 12 + int(fecha[5:7]) - 1
+
+def _dias_mes(indice: int) -> int:
+    anio, mes = divmod(indice, 12)
+    return calendar.monthrange(anio, mes + 1)[1]
+
+def _nombre_mes(indice: int) -> str:
+    anio, mes = divmod(indice, 12)
+    return f"{anio:04d}-{mes + 1:02d}"
+
+class PronosticoFlujo:
+    """
+    Proyecta el saldo de cada cuenta N meses hacia adelante.
+    
+    El historial se resume por cuenta en totales mensuales por (tipo, categoria).
+    Las series que se repiten casi todos los meses con montos parecidos se
+    proyectan como movimientos recurrentes en su día habitual; el resto se
+    proyecta con el promedio de la categoría para ese mes del año (o el
+    promedio mensual general si no hay historia de ese mes), repartido por día.
+    
+    Los resúmenes se actualizan solo con las transacciones nuevas y los
+    resultados se guardan en caché; una transacción nueva invalida únicamente
+    la cuenta que toca.
+    """
+    MIN_MESES_RECURRENTE = 3
+    COBERTURA_RECURRENTE = 0.75  # fracción de meses con movimiento desde que apareció
+    VARIACION_RECURRENTE = 0.25  # diferencia máxima entre montos mensuales, relativa a la mediana
+    
+    def __init__(self, manager: FinanceManager):
+        self.manager = manager
+        self._lista = None
+        self._revision = 0
+        self._vistas = 0
+        # cuenta -> (tipo, categoria) -> indice de mes -> [total, primer día]
+        self._series: Dict[str, Dict[tuple, Dict[int, list]]] = {}
+        self._primer_mes: Dict[str, int] = {}
+        self._cache: Dict[tuple, dict] = {}
+    
+    def _sincronizar(self):
+        trans = self.manager.transacciones
+        if (trans is not self._lista or len(trans) < self._vistas
+                or self.manager.revision != self._revision):
+            # Los datos se recargaron o se modificaron: se rehace todo
+            self._lista = trans
+            self._revision = self.manager.revision
+            self._vistas = 0
+            self._series = {}
+            self._primer_mes = {}
+            self._cache = {}
+        
+        # Primero se leen todas las filas nuevas y después se acumulan: un error a
+        # mitad de camino no debe dejar los resúmenes a medio actualizar. Las filas
+        # con fecha ilegible (archivos antiguos o editados a mano) se omiten
+        filas = []
+        for t in trans[self._vistas:]:
+            try:
+                filas.append((t, _indice_mes(t.fecha), int(t.fecha[8:10]),
+                              t.monto if t.tipo == "ingreso" else -t.monto))
+            except (TypeError, ValueError):
+                continue
+        self._vistas = len(trans)
+        
+        tocadas = set()
+        for t, mes, dia, monto in filas:
+            serie = self._series.setdefault(t.cuenta, {}).setdefault((t.tipo, t.categoria), {})
+            total = serie.get(mes)
+            if total is None:
+                serie[mes] = [monto, dia]
+            else:
+                total[0] += monto
+                total[1] = min(total[1], dia)
+            if mes < self._primer_mes.get(t.cuenta, mes + 1):
+                self._primer_mes[t.cuenta] = mes
+            tocadas.add(t.cuenta)
+        
+        if tocadas:
+            self._cache = {k: v for k, v in self._cache.items() if k[0] not in tocadas}
+    
+    def _es_recurrente(self, serie: Dict[int, list], mes_actual: int):
+        """Devuelve (monto, día) si la serie es recurrente, o None"""
+        meses = sorted(m for m in serie if m < mes_actual)
+        if len(meses) < self.MIN_MESES_RECURRENTE or meses[-1] < mes_actual - 2:
+            return None
+        if len(meses) < self.COBERTURA_RECURRENTE * (mes_actual - meses[0]):
+            return None
+        
+        ultimos = meses[-6:]
+        montos = sorted(serie[m][0] for m in ultimos)
+        mediana = montos[len(montos) // 2]
+        if not mediana or (montos[-1] - montos[0]) > self.VARIACION_RECURRENTE * abs(mediana):
+            return None
+        dias = sorted(serie[m][1] for m in ultimos)
+        return mediana, dias[len(dias) // 2]
+    
+    def _proyectar(self, cuenta: Cuenta, meses: int, hoy: datetime) -> dict:
+        mes_actual = hoy.year * 12 + hoy.month - 1
+        series = self._series.get(cuenta.nombre, {})
+        primer_mes = self._primer_mes.get(cuenta.nombre, mes_actual)
+        
+        # Meses completos de historia: desde el primero con movimientos hasta el anterior al actual
+        completos = range(primer_mes, mes_actual)
+        por_mes_del_anio = [0] * 12
+        for m in completos:
+            por_mes_del_anio[m % 12] += 1
+        
+        recurrentes = []  # (tipo, categoria, monto, día)
+        # Estimación por mes del año, separada en ingresos [0] y gastos [1]
+        variable_mes = [[0.0, 0.0] for _ in range(12)]
+        for (tipo, categoria), serie in series.items():
+            recurrente = self._es_recurrente(serie, mes_actual)
+            if recurrente:
+                recurrentes.append((tipo, categoria) + recurrente)
+                continue
+            if not completos:
+                continue
+            
+            suma_mes = [0.0] * 12
+            for m, (total, _) in serie.items():
+                if m < mes_actual:
+                    suma_mes[m % 12] += total
+            promedio = sum(suma_mes) / len(completos)
+            lado = 0 if tipo == "ingreso" else 1
+            for i in range(12):
+                if por_mes_del_anio[i]:
+                    variable_mes[i][lado] += suma_mes[i] / por_mes_del_anio[i]
+                else:
+                    variable_mes[i][lado] += promedio
+        
+        saldo = cuenta.saldo
+        # Una cuenta que ya está en negativo se alerta en el primer día proyectado
+        negativo = False
+        resumen = []
+        alertas = []
+        for mes in range(mes_actual, mes_actual + meses + 1):
+            dias = _dias_mes(mes)
+            desde = hoy.day + 1 if mes == mes_actual else 1
+            
+            eventos = {}
+            for tipo, categoria, monto, dia in recurrentes:
+                # En el mes en curso solo falta lo que aún no ocurrió
+                if mes == mes_actual and mes in series[(tipo, categoria)]:
+                    continue
+                dia = min(dia, dias)
+                if dia >= desde:
+                    evento = eventos.setdefault(dia, [0.0, 0.0])
+                    evento[0 if tipo == "ingreso" else 1] += monto
+            ingreso_diario = variable_mes[mes % 12][0] / dias
+            gasto_diario = variable_mes[mes % 12][1] / dias
+            
+            ingresos = gastos = 0.0
+            for dia in range(desde, dias + 1):
+                ingreso, gasto = eventos.get(dia, (0.0, 0.0))
+                ingreso += ingreso_diario
+                gasto += gasto_diario
+                ingresos += ingreso
+                gastos -= gasto
+                saldo += ingreso + gasto
+                if saldo < 0 and not negativo:
+                    alertas.append({
+                        "fecha": f"{_nombre_mes(mes)}-{dia:02d}",
+                        "saldo": round(saldo, 2)
+                    })
+                negativo = saldo < 0
+            
+            resumen.append({
+                "mes": _nombre_mes(mes),
+                "ingresos": round(ingresos, 2),
+                "gastos": round(gastos, 2),
+                "saldo_final": round(saldo, 2)
+            })
+        
+        return {
+            "cuenta": cuenta.nombre,
+            "saldo_actual": cuenta.saldo,
+            "meses": resumen,
+            "alertas": alertas,
+            "recurrentes": [
+                {"tipo": tipo, "categoria": categoria, "monto": round(abs(monto), 2), "dia": dia}
+                for tipo, categoria, monto, dia in recurrentes
+            ]
+        }
+    
+    def pronosticar(self, meses: int = 3, cuenta: Optional[str] = None, hoy: datetime = None) -> List[dict]:
+        """
+        Pronóstico por cuenta hasta el final del mes que está `meses` meses
+        adelante. Cada alerta marca el primer día de un tramo con saldo negativo,
+        incluido el tramo en curso si la cuenta ya está en negativo.
+        """
+        hoy = hoy or datetime.now()
+        self._sincronizar()
+        
+        resultados = []
+        for c in self.manager.cuentas:
+            if cuenta and c.nombre != cuenta:
+                continue
+            clave = (c.nombre, meses, hoy.date(), c.saldo)
+            if clave not in self._cache:
+                self._cache[clave] = self._proyectar(c, meses, hoy)
+            resultados.append(self._cache[clave])
+        return resultados
+
+# ============================================================
+# CATEGORIZACIÓN AUTOMÁTICA
+# ============================================================
+
+_SIN_ACENTOS = str.maketrans("áàäâéèëêíìïîóòöôúùüûñç", "aaaaeeeeiiiioooouuuunc")
+_PALABRA = re.compile(r"[a-z]{2,}")
+
+def _normalizar(texto: str) -> str:
+    return texto.lower().translate(_SIN_ACENTOS)
+
+class AutomataPalabras:
+    """
+    Autómata de Aho–Corasick: encuentra en una sola pasada todas las
+    palabras clave contenidas en un texto, sin importar cuántas sean.
+    """
+    def __init__(self, palabras: List[tuple]):
+        # palabras: lista de (palabra, valor)
+        self._siguiente: List[Dict[str, int]] = [{}]
+        self._falla: List[int] = [0]
+        self._salida: List[List] = [[]]
+        
+        for palabra, valor in palabras:
+            nodo = 0
+            for letra in palabra:
+                destino = self._siguiente[nodo].get(letra)
+                if destino is None:
+                    destino = len(self._siguiente)
+                    self._siguiente[nodo][letra] = destino
+                    self._siguiente.append({})
+                    self._falla.append(0)
+                    self._salida.append([])
+                nodo = destino
+            self._salida[nodo].append(valor)
+        
+        # Enlaces de falla por niveles (BFS)
+        cola = list(self._siguiente[0].values())
+        for nodo in cola:
+            for letra, destino in self._siguiente[nodo].items():
+                falla = self._falla[nodo]
+                while falla and letra not in self._siguiente[falla]:
+                    falla = self._falla[falla]
+                self._falla[destino] = self._siguiente[falla].get(letra, 0)
+                self._salida[destino] = self._salida[destino] + self._salida[self._falla[destino]]
+                cola.append(destino)
+    
+    def buscar(self, texto: str) -> List:
+        siguiente, falla, salida = self._siguiente, self._falla, self._salida
+        encontrados = []
+        nodo = 0
+        for letra in texto:
+            while nodo and letra not in siguiente[nodo]:
+                nodo = falla[nodo]
+            nodo = siguiente[nodo].get(letra, 0)
+            if salida[nodo]:
+                encontrados.extend(salida[nodo])
+        return encontrados
+
+class Categorizador:
+    """
+    Sugiere la categoría de una transacción a partir de su descripción,
+    monto y cuenta.
+    
+    Primero se aplican las reglas del usuario (manager.reglas): las palabras
+    clave se buscan todas a la vez con un único autómata y las expresiones
+    regulares se prueban una por una; gana la primera regla definida que
+    coincida y sea aplicable a la transacción.
+    Si ninguna aplica, se usa un modelo bayesiano ingenuo de frecuencias de
+    palabras aprendido de las transacciones ya categorizadas, que se actualiza
+    solo con las transacciones nuevas.
+    """
+    def __init__(self, manager: FinanceManager):
+        self.manager = manager
+        # Reglas compiladas
+        self._reglas = None
+        self._firma_reglas = 0
+        self._usa_monto = False
+        self._categorias = None
+        self._firma_categorias = 0
+        self._automata: Optional[AutomataPalabras] = None
+        self._regex = None
+        # Modelo aprendido: conteos por categoría
+        self._lista = None
+        self._revision = 0
+        self._vistas = 0
+        self._conteos: Dict[str, Dict[str, int]] = {}  # palabra -> categoria -> veces
+        self._palabras_cat: Dict[str, int] = {}
+        self._docs_cat: Dict[str, int] = {}
+        self._pesos: Dict[str, Dict[str, float]] = {}  # palabra -> categoria -> log(veces + 1)
+        self._base = None
+        self._memo: Dict[tuple, Optional[str]] = {}
+    
+    # ---------------- Reglas ----------------
+    
+    def _compilar_reglas(self):
+        reglas = self.manager.reglas
+        self._reglas = reglas
+        self._firma_reglas = len(reglas)
+        self._automata = AutomataPalabras([
+            (_normalizar(r.patron), i) for i, r in enumerate(reglas) if not r.es_regex and r.patron
+        ])
+        # Cada expresión se compila por separado: unidas con "|" se pierden las
+        # coincidencias solapadas y los grupos con nombre repetido no compilan
+        self._regex = {}
+        for i, r in enumerate(reglas):
+            if r.es_regex:
+                try:
+                    self._regex[i] = re.compile(r.patron, re.IGNORECASE)
+                except re.error:
+                    pass  # regla inválida en el archivo: se ignora
+        self._usa_monto = any(r.monto_min is not None or r.monto_max is not None for r in reglas)
+        self._memo = {}
+    
+    def _por_reglas(self, descripcion, texto, monto, cuenta, tipo, tipos_cat):
+        palabras = set(self._automata.buscar(texto))
+        for i, regla in enumerate(self._reglas):
+            if tipos_cat.get(regla.categoria) != tipo or not regla.aplica(monto, cuenta):
+                continue
+            if regla.es_regex:
+                regex = self._regex.get(i)
+                if regex and regex.search(descripcion):
+                    return regla.categoria
+            elif i in palabras:
+                return regla.categoria
+        return None
+    
+    # ---------------- Modelo aprendido ----------------
+    
+    @staticmethod
+    def _rasgos(texto, monto, cuenta):
+        rasgos = _PALABRA.findall(texto)
+        rasgos.append("@" + cuenta)
+        # Orden de magnitud del monto: 1-9, 10-99, ...
+        rasgos.append("$" + str(len(str(int(abs(monto))))))
+        return rasgos
+    
+    def _sincronizar(self):
+        if self.manager.reglas is not self._reglas or len(self.manager.reglas) != self._firma_reglas:
+            self._compilar_reglas()
+        
+        # Las sugerencias guardadas dependen de qué categorías existen
+        categorias = self.manager.categorias
+        if categorias is not self._categorias or len(categorias) != self._firma_categorias:
+            self._categorias = categorias
+            self._firma_categorias = len(categorias)
+            self._memo = {}
+        
+        trans = self.manager.transacciones
+        if (trans is not self._lista or len(trans) < self._vistas
+                or self.manager.revision != self._revision):
+            self._lista = trans
+            self._revision = self.manager.revision
+            self._vistas = 0
+            self._conteos, self._palabras_cat, self._docs_cat = {}, {}, {}
+            self._pesos = {}
+            self._base = None
+            self._memo = {}
+        
+        nuevas = trans[self._vistas:]
+        self._vistas = len(trans)
+        aprendidas = 0
+        for t in nuevas:
+            if t.tipo not in ("ingreso", "gasto") or not t.categoria:
+                continue
+            cat = t.categoria
+            rasgos = self._rasgos(_normalizar(t.descripcion), t.monto, t.cuenta)
+            for r in rasgos:
+                por_cat = self._conteos.setdefault(r, {})
+                n = por_cat[cat] = por_cat.get(cat, 0) + 1
+                # Solo cambia el peso de esta palabra en esta categoría
+                self._pesos.setdefault(r, {})[cat] = math.log(n + 1)
+            self._palabras_cat[cat] = self._palabras_cat.get(cat, 0) + len(rasgos)
+            self._docs_cat[cat] = self._docs_cat.get(cat, 0) + 1
+            aprendidas += 1
+        if aprendidas:
+            self._base = None
+            self._memo = {}
+    
+    def _preparar_base(self):
+        # log P(c) y log del denominador de Laplace por categoría; depende de
+        # totales globales, pero es un cálculo por categoría, no por palabra
+        vocabulario = len(self._conteos)
+        total_docs = sum(self._docs_cat.values())
+        self._base = {c: (math.log(n / total_docs), math.log(self._palabras_cat[c] + vocabulario))
+                      for c, n in self._docs_cat.items()}
+    
+    def _por_modelo(self, texto, monto, cuenta, tipo, tipos_cat):
+        if self._base is None:
+            self._preparar_base()
+        base, pesos = self._base, self._pesos
+        
+        conocidos = palabras = 0
+        acumulado: Dict[str, float] = {}
+        for r in self._rasgos(texto, monto, cuenta):
+            por_cat = pesos.get(r)
+            if por_cat is None:
+                continue
+            conocidos += 1
+            palabras += r[0].isalpha()
+            for c, w in por_cat.items():
+                acumulado[c] = acumulado.get(c, 0.0) + w
+        # Cuenta y monto solos no bastan para sugerir
+        if not palabras:
+            return None
+        
+        mejor, mejor_puntaje = None, None
+        for c, (prior, norma) in base.items():
+            if tipos_cat.get(c) != tipo:
+                continue
+            puntaje = prior - conocidos * norma + acumulado.get(c, 0.0)
+            if mejor_puntaje is None or puntaje > mejor_puntaje:
+                mejor, mejor_puntaje = c, puntaje
+        return mejor
+    
+    # ---------------- Interfaz pública ----------------
+    
+    def sugerir_lote(self, items: List[tuple]) -> List[Optional[str]]:
+        """
+        items: lista de (descripcion, monto, cuenta, tipo).
+        Devuelve la categoría sugerida para cada uno, o None.
+        """
+        self._sincronizar()
+        tipos_cat = {c.nombre: c.tipo for c in self.manager.categorias}
+        memo = self._memo
+        
+        sugerencias = []
+        for descripcion, monto, cuenta, tipo in items:
+            texto = _normalizar(descripcion or "")
+            # Con descripciones repetidas (importaciones) casi todo sale de aquí
+            # Las expresiones regulares ven la descripción original, no la normalizada
+            clave = (descripcion if self._regex else texto,
+                     monto if self._usa_monto else len(str(int(abs(monto)))), cuenta, tipo)
+            if clave not in memo:
+                memo[clave] = (self._por_reglas(descripcion or "", texto, monto, cuenta, tipo, tipos_cat)
+                               or self._por_modelo(texto, monto, cuenta, tipo, tipos_cat))
+            sugerencias.append(memo[clave])
+        return sugerencias
+    
+    def sugerir(self, descripcion, monto, cuenta, tipo) -> Optional[str]:
+        return self.sugerir_lote([(descripcion, monto, cuenta, tipo)])[0]
+    
+    def categorizar_pendientes(self) -> int:
+        """Asigna categoría a los ingresos y gastos que no la tienen. Devuelve cuántos se asignaron."""
+        pendientes = [t for t in self.manager.transacciones
+                      if not t.categoria and t.tipo in ("ingreso", "gasto")]
+        sugerencias = self.sugerir_lote([(t.descripcion, t.monto, t.cuenta, t.tipo) for t in pendientes])
+        cambios = [(t, c) for t, c in zip(pendientes, sugerencias) if c]
+        if cambios:
+            self.manager.actualizar_categorias(cambios)
+        return len(cambios)
+
+# ============================================================
+# API LOCAL (asyncio)
+# ============================================================
+
+class ErrorAPI(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+class ServidorAPI:
+    """
+    API HTTP/JSON local sobre FinanceManager para scripts y automatizaciones.
+    
+    Las lecturas se responden directamente. Las mutaciones se encolan y las
+    aplica un único escritor, que toma todo lo pendiente (hasta MAX_LOTE),
+    lo aplica en orden y guarda el archivo una sola vez por lote antes de
+    responder a cada petición.
+    """
+    MAX_LOTE = 5000
+    MAX_CUERPO = 16 * 1024 * 1024
+    
+    ESTADOS = {
+        200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+        405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+        422: "Unprocessable Entity", 500: "Internal Server Error"
+    }
+    
+    def __init__(self, manager: FinanceManager, host: str = "127.0.0.1", puerto: int = 8765):
+        self.manager = manager
+        self.pronostico = PronosticoFlujo(manager)
+        self.categorizador = Categorizador(manager)
+        self.host = host
+        self.puerto = puerto
+        self._cola: Optional[asyncio.Queue] = None
+        self._escritor: Optional[asyncio.Task] = None
+        self._servidor = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rutas = {
+            ("GET", "/cuentas"): self._get_cuentas,
+            ("GET", "/transacciones"): self._get_transacciones,
+            ("GET", "/estadisticas"): self._get_estadisticas,
+            ("GET", "/pronostico"): self._get_pronostico,
+            ("POST", "/transacciones"): self._post_transaccion,
+            ("POST", "/transacciones/lote"): self._post_lote,
+            ("POST", "/transacciones/categorizar"): self._post_categorizar,
+            ("POST", "/transferencias"): self._post_transferencia
+        }
+    
+    # ---------------- Ciclo de vida ----------------
+    
+    async def iniciar(self):
+        self._cola = asyncio.Queue()
+        # El escritor se crea después de abrir el puerto: si falla, no queda colgado
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self._escritor = asyncio.create_task(self._bucle_escritor())
+        # Con puerto=0 el sistema asigna uno libre
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+    
+    async def detener(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+        await self._cola.put(None)
+        await self._escritor
+    
+    async def servir(self):
+        await self.iniciar()
+        print(f"API de finanzas en http://{self.host}:{self.puerto}")
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.detener()
+    
+    def iniciar_en_hilo(self):
+        """
+        Sirve la API desde un hilo propio, para usarla junto a la interfaz
+        compartiendo el mismo manager. Los cambios hechos desde la interfaz
+        deben pasar por ejecutar().
+        """
+        self._loop = asyncio.new_event_loop()
+        listo = threading.Event()
+        error = []
+        
+        def correr():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.iniciar())
+            except Exception as e:
+                error.append(e)
+                return
+            finally:
+                listo.set()
+            self._loop.run_forever()
+        
+        threading.Thread(target=correr, name="api-finanzas", daemon=True).start()
+        listo.wait()
+        if error:
+            raise error[0]
+    
+    def ejecutar(self, operacion):
+        """Aplica una mutación desde otro hilo a través del escritor único y devuelve su resultado"""
+        return asyncio.run_coroutine_threadsafe(self.mutar(operacion), self._loop).result()
+    
+    # ---------------- Escritor único ----------------
+    
+    async def mutar(self, operacion):
+        """Encola una operación sobre el manager y espera a que quede guardada"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((operacion, futuro))
+        return await futuro
+    
+    async def _bucle_escritor(self):
+        loop = asyncio.get_running_loop()
+        terminar = False
+        while not terminar:
+            pendientes = [await self._cola.get()]
+            while len(pendientes) < self.MAX_LOTE and not self._cola.empty():
+                pendientes.append(self._cola.get_nowait())
+            
+            resultados = []
+            with self.manager.guardado_diferido(guardar=False):
+                for item in pendientes:
+                    if item is None:
+                        terminar = True
+                        continue
+                    operacion, futuro = item
+                    try:
+                        resultados.append((futuro, operacion(), None))
+                    except Exception as e:
+                        resultados.append((futuro, None, e))
+            
+            # Nadie más muta mientras se escribe: el escritor está esperando aquí
+            if self.manager.cambios_pendientes:
+                try:
+                    await loop.run_in_executor(None, self.manager.guardar_datos)
+                except Exception as e:
+                    # Se informa el fallo a todo el lote, así que sus cambios no deben
+                    # quedar aplicados: se vuelve al último estado guardado. Cualquier
+                    # error se atrapa aquí, o moriría el único escritor
+                    try:
+                        self.manager.cargar_datos()
+                    except Exception:
+                        pass
+                    self.manager.cambios_pendientes = False
+                    resultados = [(futuro, None, e) for futuro, _, _ in resultados]
+            
+            for futuro, resultado, error in resultados:
+                if futuro.done():
+                    continue
+                if error is not None:
+                    futuro.set_exception(error)
+                else:
+                    futuro.set_result(resultado)
+    
+    # ---------------- HTTP ----------------
+    
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(writer, 400, {"error": "Petición mal formada"}, False)
+                    break
+                
+                cabeceras = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                
+                conexion = cabeceras.get("connection", "").lower()
+                mantener = conexion == "keep-alive" if version == "HTTP/1.0" else conexion != "close"
+                
+                try:
+                    largo = int(cabeceras.get("content-length") or 0)
+                except ValueError:
+                    largo = -1
+                if not 0 <= largo <= self.MAX_CUERPO:
+                    await self._responder(writer, 413, {"error": "Cuerpo inválido o demasiado grande"}, False)
+                    break
+                cuerpo = await reader.readexactly(largo) if largo else b""
+                
+                estado, datos = await self._despachar(metodo, ruta, cuerpo)
+                await self._responder(writer, estado, datos, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _responder(self, writer, estado, datos, mantener):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        cabecera = (
+            f"HTTP/1.1 {estado} {self.ESTADOS.get(estado, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+        )
+        writer.write(cabecera.encode("latin-1") + cuerpo)
+        await writer.drain()
+    
+    async def _despachar(self, metodo, ruta, cuerpo):
+        partes = urlsplit(ruta)
+        path = partes.path.rstrip("/") or "/"
+        manejador = self.rutas.get((metodo, path))
+        if manejador is None:
+            if any(r == path for _, r in self.rutas):
+                return 405, {"error": "Método no permitido"}
+            return 404, {"error": "Ruta no encontrada"}
+        
+        try:
+            if metodo == "POST":
+                try:
+                    datos = json.loads(cuerpo or b"{}")
+                except ValueError:
+                    raise ErrorAPI(400, "JSON inválido")
+                if not isinstance(datos, dict):
+                    raise ErrorAPI(400, "Se esperaba un objeto JSON")
+            else:
+                datos = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+            return await manejador(datos)
+        except ErrorAPI as e:
+            return e.estado, {"error": e.mensaje}
+        except Exception as e:
+            return 500, {"error": str(e)}
+    
+    # ---------------- Validación ----------------
+    
+    def _existe_cuenta(self, nombre):
+        return any(c.nombre == nombre for c in self.manager.cuentas)
+    
+    @staticmethod
+    def _es_finito(valor):
+        # json.loads acepta NaN e Infinity, y 1e999 se lee como infinito
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            return False
+        try:
+            return math.isfinite(valor)
+        except OverflowError:
+            return False
+    
+    def _leer_monto(self, valor, campo="monto"):
+        if not self._es_finito(valor) or valor <= 0:
+            raise ErrorAPI(400, f"'{campo}' debe ser un número positivo")
+        return float(valor)
+    
+    def _leer_entero(self, datos, campo, defecto, minimo=1, maximo=None):
+        try:
+            valor = int(datos.get(campo, defecto))
+        except (TypeError, ValueError):
+            raise ErrorAPI(400, f"'{campo}' debe ser un entero")
+        if valor < minimo or (maximo is not None and valor > maximo):
+            raise ErrorAPI(400, f"'{campo}' fuera de rango")
+        return valor
+    
+    def _leer_transaccion(self, datos):
+        """Valida un dict de transacción y lo devuelve con los argumentos de agregar_transaccion"""
+        if not isinstance(datos, dict):
+            raise ErrorAPI(400, "Cada transacción debe ser un objeto JSON")
+        tipo = datos.get("tipo")
+        if tipo not in ("ingreso", "gasto"):
+            raise ErrorAPI(400, "'tipo' debe ser 'ingreso' o 'gasto'")
+        # Sin categoría se usa la sugerida por el categorizador
+        categoria = datos.get("categoria") or None
+        if categoria is not None and not isinstance(categoria, str):
+            raise ErrorAPI(400, "'categoria' debe ser texto")
+        if categoria is not None and not any(c.nombre == categoria and c.tipo == tipo
+                                             for c in self.manager.categorias):
+            raise ErrorAPI(422, f"La categoría '{categoria}' no existe para '{tipo}'")
+        cuenta = datos.get("cuenta")
+        if not self._existe_cuenta(cuenta):
+            raise ErrorAPI(422, f"La cuenta '{cuenta}' no existe")
+        descripcion = datos.get("descripcion", "")
+        if not isinstance(descripcion, str):
+            raise ErrorAPI(400, "'descripcion' debe ser texto")
+        try:
+            # json.loads deja pasar surrogates sueltos ("\ud800") que no se pueden guardar
+            descripcion.encode("utf-8")
+        except UnicodeEncodeError:
+            raise ErrorAPI(400, "'descripcion' no es texto UTF-8 válido")
+        fecha = datos.get("fecha")
+        if fecha is not None:
+            try:
+                # strptime acepta "2026-1-5 9:00": se guarda siempre con ceros, porque
+                # el orden y el pronóstico leen la fecha como texto de ancho fijo
+                fecha = datetime.strptime(fecha, "%Y-%m-%d %H:%M").strftime("%Y-%m-%d %H:%M")
+            except (TypeError, ValueError):
+                raise ErrorAPI(400, "'fecha' debe tener el formato AAAA-MM-DD HH:MM")
+        return {
+            "monto": self._leer_monto(datos.get("monto")),
+            "tipo": tipo,
+            "categoria": categoria,
+            "cuenta": cuenta,
+            "descripcion": descripcion,
+            "fecha": fecha
+        }
+    
+    def _completar_categorias(self, validadas):
+        faltan = [d for d in validadas if d["categoria"] is None]
+        if not faltan:
+            return
+        sugerencias = self.categorizador.sugerir_lote(
+            [(d["descripcion"], d["monto"], d["cuenta"], d["tipo"]) for d in faltan]
+        )
+        # Sin sugerencia se guarda sin categoría; categorizar_pendientes la asigna después
+        for d, categoria in zip(faltan, sugerencias):
+            d["categoria"] = categoria or ""
+    
+    # ---------------- Rutas ----------------
+    
+    async def _get_cuentas(self, datos):
+        return 200, {
+            "cuentas": [c.to_dict() for c in self.manager.cuentas],
+            "balance_total": self.manager.get_balance_total()
+        }
+    
+    async def _get_transacciones(self, datos):
+        pagina = self._leer_entero(datos, "pagina", 1)
+        limite = self._leer_entero(datos, "limite", 50, maximo=1000)
+        trans, total = self.manager.get_transacciones_pagina(pagina, limite, datos.get("cuenta"))
+        return 200, {
+            "pagina": pagina,
+            "limite": limite,
+            "total": total,
+            "transacciones": [t.to_dict() for t in trans]
+        }
+    
+    async def _get_estadisticas(self, datos):
+        stats = self.manager.get_estadisticas_mes()
+        stats["balance_total"] = self.manager.get_balance_total()
+        return 200, stats
+    
+    async def _get_pronostico(self, datos):
+        meses = self._leer_entero(datos, "meses", 3, maximo=60)
+        cuenta = datos.get("cuenta")
+        if cuenta and not self._existe_cuenta(cuenta):
+            raise ErrorAPI(404, f"La cuenta '{cuenta}' no existe")
+        return 200, {"meses": meses, "cuentas": self.pronostico.pronosticar(meses, cuenta)}
+    
+    async def _post_transaccion(self, datos):
+        args = self._leer_transaccion(datos)
+        self._completar_categorias([args])
+        trans = await self.mutar(lambda: self.manager.agregar_transaccion(**args))
+        return 201, trans.to_dict()
+    
+    async def _post_lote(self, datos):
+        lista = datos.get("transacciones")
+        if not isinstance(lista, list) or not lista:
+            raise ErrorAPI(400, "'transacciones' debe ser una lista no vacía")
+        validadas = []
+        for i, d in enumerate(lista):
+            try:
+                validadas.append(self._leer_transaccion(d))
+            except ErrorAPI as e:
+                raise ErrorAPI(e.estado, f"Transacción {i}: {e.mensaje}")
+        self._completar_categorias(validadas)
+        trans = await self.mutar(lambda: self.manager.agregar_transacciones_lote(validadas))
+        return 201, {"creadas": len(trans), "ids": [t.id for t in trans]}
+    
+    async def _post_categorizar(self, datos):
+        asignadas = await self.mutar(self.categorizador.categorizar_pendientes)
+        return 200, {"asignadas": asignadas}
+    
+    async def _post_transferencia(self, datos):
+        origen, destino = datos.get("origen"), datos.get("destino")
+        for nombre in (origen, destino):
+            if not self._existe_cuenta(nombre):
+                raise ErrorAPI(422, f"La cuenta '{nombre}' no existe")
+        if origen == destino:
+            raise ErrorAPI(400, "Origen y destino deben ser distintos")
+        monto = self._leer_monto(datos.get("monto"))
+        comision = datos.get("comision", 0.41)
+        if not self._es_finito(comision) or comision < 0:
+            raise ErrorAPI(400, "'comision' debe ser un número no negativo")
+        
+        exito, mensaje = await self.mutar(
+            lambda: self.manager.transferir_entre_cuentas(origen, destino, monto, comision)
+        )
+        if not exito:
+            raise ErrorAPI(409, mensaje)
+        return 201, {"mensaje": mensaje}
+
 # ============================================================
 # INTERFAZ CON FLET
 # ============================================================
 
-def main(page: ft.Page):
+def main(page: ft.Page, api: Optional[tuple] = None):
     page.title = "💰 Finanzas Pro"
     page.theme_mode = ft.ThemeMode.DARK
     page.bgcolor = "#1a1a2e"
@@ -263,6 +1231,19 @@ def main(page: ft.Page):
     }
     
     manager = FinanceManager()
+    pronostico = PronosticoFlujo(manager)
+    categorizador = Categorizador(manager)
+    
+    # API local opcional (host, puerto) sobre el mismo manager
+    servidor = None
+    if api:
+        servidor = ServidorAPI(manager, *api)
+        servidor.iniciar_en_hilo()
+    
+    def mutar(operacion):
+        # Con la API activa, la interfaz escribe por su escritor único
+        # y así ninguno de los dos pisa lo que guardó el otro
+        return servidor.ejecutar(operacion) if servidor else operacion()
     
     # ============================================================
     # COMPONENTES UI
@@ -345,7 +1326,7 @@ def main(page: ft.Page):
                             size=24,
                             color=colores_tipo.get(t.tipo, "white")
                         ),
-                        title=ft.Text(t.categoria, color=COLORS["text"]),
+                        title=ft.Text(t.categoria or "Sin categoría", color=COLORS["text"]),
                         subtitle=ft.Text(
                             f"{t.cuenta} • {t.fecha[:10]}", 
                             size=11, 
@@ -480,7 +1461,81 @@ def main(page: ft.Page):
             crear_grid_categorias(cats_ingreso),
             
             ft.Text("Gastos", size=16, weight="bold", color=COLORS["danger"], padding=ft.padding.only(left=20, top=20)),
-            crear_grid_categorias(cats_gasto)
+            crear_grid_categorias(cats_gasto),
+            
+            ft.Row([
+                ft.Text("Reglas automáticas", size=16, weight="bold", color=COLORS["text"]),
+                ft.IconButton(
+                    icon=ft.icons.ADD,
+                    icon_color=COLORS["accent"],
+                    on_click=lambda _: mostrar_dialogo_nueva_regla()
+                )
+            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+            crear_lista_reglas()
+        ], scroll=ft.ScrollMode.AUTO)
+    
+    def crear_lista_reglas():
+        def eliminar(indice):
+            mutar(lambda: manager.eliminar_regla(indice))
+            cambiar_vista(2)
+        
+        return ft.Column([
+            ft.Container(
+                content=ft.ListTile(
+                    title=ft.Text(f"{'/' + r.patron + '/' if r.es_regex else r.patron} → {r.categoria}", color=COLORS["text"]),
+                    trailing=ft.IconButton(
+                        icon=ft.icons.DELETE,
+                        icon_color="grey",
+                        on_click=lambda _, i=i: eliminar(i)
+                    )
+                ),
+                bgcolor=COLORS["secondary"],
+                border_radius=10,
+                margin=ft.margin.only(bottom=5)
+            ) for i, r in enumerate(manager.reglas)
+        ], spacing=5)
+    
+    def vista_pronostico():
+        meses = 3
+        tarjetas = []
+        for p in pronostico.pronosticar(meses):
+            saldo_final = p["meses"][-1]["saldo_final"]
+            filas = [
+                ft.Row([
+                    ft.Text(p["cuenta"], size=16, weight="bold", color=COLORS["text"]),
+                    ft.Text(
+                        f"${p['saldo_actual']:,.2f} → ${saldo_final:,.2f}",
+                        size=14,
+                        color="green" if saldo_final >= 0 else COLORS["danger"]
+                    )
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+            ]
+            for m in p["meses"]:
+                filas.append(ft.Text(
+                    f"{m['mes']}: +${m['ingresos']:,.2f}  -${m['gastos']:,.2f}  = ${m['saldo_final']:,.2f}",
+                    size=12,
+                    color="grey"
+                ))
+            for a in p["alertas"]:
+                filas.append(ft.Text(
+                    f"⚠ Saldo negativo el {a['fecha']} (${a['saldo']:,.2f})",
+                    size=12,
+                    color=COLORS["warning"]
+                ))
+            tarjetas.append(ft.Container(
+                content=ft.Column(filas, spacing=4),
+                padding=15,
+                bgcolor=COLORS["secondary"],
+                border_radius=10,
+                margin=ft.margin.only(bottom=5)
+            ))
+        
+        return ft.Column([
+            ft.Container(
+                content=ft.Text(f"Pronóstico a {meses} meses", size=24, weight="bold"),
+                padding=20
+            ),
+            ft.Container(content=ft.Column(tarjetas, spacing=5), padding=15)
         ], scroll=ft.ScrollMode.AUTO)
     
     # ============================================================
@@ -502,11 +1557,11 @@ def main(page: ft.Page):
         
         def guardar(e):
             if nombre.value:
-                manager.agregar_cuenta(
+                mutar(lambda: manager.agregar_cuenta(
                     nombre.value, 
                     float(saldo.value or 0), 
                     tipo.value or "efectivo"
-                )
+                ))
                 actualizar_vista()
                 page.dialog.open = False
                 page.update()
@@ -536,15 +1591,38 @@ def main(page: ft.Page):
             options=[ft.dropdown.Option(c.nombre) for c in manager.categorias if c.tipo == tipo]
         )
         
+        elegida_a_mano = {"valor": False}
+        
+        def elegir_categoria(e):
+            elegida_a_mano["valor"] = True
+        
+        def sugerir_categoria(e):
+            # No se pisa una categoría elegida por el usuario
+            if elegida_a_mano["valor"] or not descripcion.value:
+                return
+            try:
+                m = float(monto.value or 0)
+            except ValueError:
+                m = 0
+            sugerida = categorizador.sugerir(descripcion.value, m, cuenta_dd.value or "", tipo)
+            if sugerida:
+                cat_dd.value = sugerida
+                page.update()
+        
+        cat_dd.on_change = elegir_categoria
+        descripcion.on_change = sugerir_categoria
+        monto.on_change = sugerir_categoria
+        cuenta_dd.on_change = sugerir_categoria
+        
         def guardar(e):
             if monto.value and cuenta_dd.value and cat_dd.value:
-                manager.agregar_transaccion(
+                mutar(lambda: manager.agregar_transaccion(
                     float(monto.value),
                     tipo,
                     cat_dd.value,
                     cuenta_dd.value,
                     descripcion.value
-                )
+                ))
                 actualizar_vista()
                 page.dialog.open = False
                 page.update()
@@ -593,12 +1671,12 @@ def main(page: ft.Page):
         
         def transferir(e):
             if origen.value and destino.value and monto.value and origen.value != destino.value:
-                exito, mensaje = manager.transferir_entre_cuentas(
+                exito, mensaje = mutar(lambda: manager.transferir_entre_cuentas(
                     origen.value,
                     destino.value,
                     float(monto.value),
                     float(comision.value or 0.41)
-                )
+                ))
                 
                 actualizar_vista()
                 page.dialog.open = False
@@ -637,7 +1715,7 @@ def main(page: ft.Page):
         
         def guardar(e):
             if nombre.value and tipo.value:
-                manager.agregar_categoria(nombre.value, tipo.value, icono.value)
+                mutar(lambda: manager.agregar_categoria(nombre.value, tipo.value, icono.value))
                 actualizar_vista()
                 page.dialog.open = False
                 page.update()
@@ -653,6 +1731,37 @@ def main(page: ft.Page):
         page.dialog.open = True
         page.update()
     
+    def mostrar_dialogo_nueva_regla():
+        patron = ft.TextField(label="Palabra clave (ej: uber)")
+        categoria = ft.Dropdown(
+            label="Categoría",
+            options=[ft.dropdown.Option(c.nombre) for c in manager.categorias]
+        )
+        es_regex = ft.Checkbox(label="Expresión regular", value=False)
+        
+        def guardar(e):
+            if patron.value and categoria.value:
+                try:
+                    mutar(lambda: manager.agregar_regla(patron.value, categoria.value, es_regex.value))
+                except re.error:
+                    patron.error_text = "Expresión regular inválida"
+                    page.update()
+                    return
+                cambiar_vista(2)
+                page.dialog.open = False
+                page.update()
+        
+        page.dialog = ft.AlertDialog(
+            title=ft.Text("Nueva Regla"),
+            content=ft.Column([patron, categoria, es_regex], tight=True),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda _: cerrar_dialogo()),
+                ft.ElevatedButton("Guardar", on_click=guardar)
+            ]
+        )
+        page.dialog.open = True
+        page.update()
+    
     def cerrar_dialogo():
         page.dialog.open = False
         page.update()
@@ -664,7 +1773,7 @@ def main(page: ft.Page):
     content_area = ft.Container(expand=True)
     
     def cambiar_vista(index):
-        vistas = [vista_principal, vista_transacciones, vista_categorias]
+        vistas = [vista_principal, vista_transacciones, vista_categorias, vista_pronostico]
         content_area.content = vistas[index]()
         page.update()
     
@@ -677,7 +1786,8 @@ def main(page: ft.Page):
         destinations=[
             ft.NavigationDestination(icon=ft.icons.DASHBOARD, label="Resumen"),
             ft.NavigationDestination(icon=ft.icons.SWAP_HORIZ, label="Transacciones"),
-            ft.NavigationDestination(icon=ft.icons.CATEGORY, label="Categorías")
+            ft.NavigationDestination(icon=ft.icons.CATEGORY, label="Categorías"),
+            ft.NavigationDestination(icon=ft.icons.TIMELINE, label="Pronóstico")
         ],
         on_change=lambda e: cambiar_vista(e.control.selected_index),
         bgcolor=COLORS["primary"],
@@ -701,4 +1811,22 @@ def main(page: ft.Page):
     cambiar_vista(0)
 
 # Iniciar app
-ft.app(target=main)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finanzas Pro")
+    parser.add_argument("--api", action="store_true",
+                        help="Inicia solo la API local HTTP/JSON, sin interfaz")
+    parser.add_argument("--con-api", action="store_true",
+                        help="Inicia la interfaz y también la API local, compartiendo los datos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    args, _ = parser.parse_known_args()
+    
+    if args.api:
+        try:
+            asyncio.run(ServidorAPI(FinanceManager(), args.host, args.puerto).servir())
+        except KeyboardInterrupt:
+            pass
+    elif args.con_api:
+        ft.app(target=lambda page: main(page, (args.host, args.puerto)))
+    else:
+        ft.app(target=main)